@@ -0,0 +1,219 @@
+#
+# Copyright (c) 2024-2025
+#
+# SPDX-License-Identifier: BSD 2-Clause License
+#
+
+"""Audio sample conversion helpers.
+
+The float -> 16-bit PCM conversion runs on every synthesized sentence, and the
+2:1 / 1:2 resamplers on every AudioSocket packet. With numba installed each is
+a single compiled, saturating pass over the buffer; without it, an equivalent
+NumPy path is used.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _float_to_int16_numpy(samples: np.ndarray, out: np.ndarray):
+    """Scale and saturate float samples into `out` using NumPy ufuncs."""
+    scaled = np.multiply(samples, 32767.0)
+    np.clip(scaled, -32768.0, 32767.0, out=scaled)
+    out[:] = scaled
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _float_to_int16_kernel(samples, out):
+        for i in range(samples.size):
+            v = samples[i] * 32767.0
+            if v > 32767.0:
+                v = 32767.0
+            elif v < -32768.0:
+                v = -32768.0
+            out[i] = np.int16(v)
+
+    # Compile now so the first synthesized sentence does not pay for it
+    _float_to_int16_kernel(np.zeros(1, dtype=np.float32), np.empty(1, dtype=np.int16))
+
+else:
+    _float_to_int16_kernel = _float_to_int16_numpy
+
+
+# Half-band low-pass FIR for the 2:1 and 1:2 conversions (Kaiser-windowed sinc
+# with unit DC gain, i.e. scipy's firwin(41, 0.5)). Its even/odd taps are the
+# two phases of the interpolation filter.
+HALFBAND_DELAY = 20
+_halfband_n = np.arange(2 * HALFBAND_DELAY + 1) - HALFBAND_DELAY
+HALFBAND_FIR = (np.sinc(_halfband_n / 2) * np.kaiser(_halfband_n.size, 5.0)).astype(np.float32)
+HALFBAND_FIR /= HALFBAND_FIR.sum()
+HALFBAND_PHASES = (2 * HALFBAND_FIR[0::2], 2 * HALFBAND_FIR[1::2])
+
+
+def _saturate_int16(samples: np.ndarray) -> np.ndarray:
+    """Round float samples that are already at int16 scale, saturating."""
+    np.clip(samples, -32768.0, 32767.0, out=samples)
+    return samples.astype(np.int16)
+
+
+def _upsample2_numpy(samples, phase0, phase1, start, count):
+    x = samples.astype(np.float32)
+    out = np.empty(2 * count, dtype=np.float32)
+    out[0::2] = np.convolve(x, phase0)[start : start + count]
+    out[1::2] = np.convolve(x, phase1)[start : start + count]
+    return _saturate_int16(out)
+
+
+def _downsample2_numpy(samples, taps, start, count):
+    x = samples.astype(np.float32)
+    return _saturate_int16(np.convolve(x, taps)[start : start + 2 * count : 2])
+
+
+# The kernels compute `count` output samples (pairs, when upsampling) whose
+# filter is centred `start` input samples into `samples`; taps that fall
+# outside the array read as zeros.
+if njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _upsample2_kernel(samples, phase0, phase1, start, count):
+        n = samples.size
+        out = np.empty(2 * count, dtype=np.int16)
+        for m in range(count):
+            for p in range(2):
+                taps = phase0 if p == 0 else phase1
+                acc = np.float32(0.0)
+                for j in range(taps.size):
+                    i = m + start - j
+                    if 0 <= i < n:
+                        acc += taps[j] * samples[i]
+                if acc > 32767.0:
+                    acc = 32767.0
+                elif acc < -32768.0:
+                    acc = -32768.0
+                out[2 * m + p] = np.int16(acc)
+        return out
+
+    @njit(cache=True, fastmath=True)
+    def _downsample2_kernel(samples, taps, start, count):
+        n = samples.size
+        out = np.empty(count, dtype=np.int16)
+        for m in range(count):
+            acc = np.float32(0.0)
+            for k in range(taps.size):
+                i = 2 * m + start - k
+                if 0 <= i < n:
+                    acc += taps[k] * samples[i]
+            if acc > 32767.0:
+                acc = 32767.0
+            elif acc < -32768.0:
+                acc = -32768.0
+            out[m] = np.int16(acc)
+        return out
+
+    # Compile now, for both the read-only int16 views np.frombuffer returns
+    # and the writable arrays HalfbandStream builds, so the first audio
+    # packet of a call does not pay for JIT compilation
+    for _warmup in (np.frombuffer(bytes(4), dtype=np.int16), np.zeros(2, dtype=np.int16)):
+        _upsample2_kernel(_warmup, *HALFBAND_PHASES, 0, 2)
+        _downsample2_kernel(_warmup, HALFBAND_FIR, 0, 1)
+
+else:
+    _upsample2_kernel = _upsample2_numpy
+    _downsample2_kernel = _downsample2_numpy
+
+
+def upsample2_int16(samples: np.ndarray) -> np.ndarray:
+    """Double the sample rate of 16-bit PCM (e.g. 8kHz -> 16kHz).
+
+    Output matches `scipy.signal.resample_poly(samples, 2, 1)`, saturated.
+
+    Args:
+        samples: 1-D int16 array.
+
+    Returns:
+        A new int16 array with twice as many samples.
+    """
+    return _upsample2_kernel(samples, *HALFBAND_PHASES, HALFBAND_DELAY // 2, samples.size)
+
+
+def downsample2_int16(samples: np.ndarray) -> np.ndarray:
+    """Halve the sample rate of 16-bit PCM (e.g. 16kHz -> 8kHz).
+
+    Output matches `scipy.signal.resample_poly(samples, 1, 2)`, saturated.
+
+    Args:
+        samples: 1-D int16 array.
+
+    Returns:
+        A new int16 array with half as many samples (rounded up).
+    """
+    return _downsample2_kernel(samples, HALFBAND_FIR, HALFBAND_DELAY, (samples.size + 1) // 2)
+
+
+class HalfbandStream:
+    """Resample a stream of 16-bit PCM packets by 2:1 or 1:2.
+
+    `upsample2_int16` / `downsample2_int16` treat each buffer as a whole
+    signal and zero-pad its edges, which clicks at every packet boundary when
+    applied packet by packet. This keeps the tail of the previous input so
+    consecutive packets are filtered as one continuous signal. The output is
+    delayed by the filter's group delay (HALFBAND_DELAY samples at the higher
+    rate, 1.25ms at 16kHz).
+
+    Args:
+        up: True to double the sample rate, False to halve it.
+    """
+
+    def __init__(self, up: bool):
+        self._up = up
+        # Input samples the filter still needs from earlier packets
+        history = len(HALFBAND_PHASES[0]) - 1 if up else HALFBAND_FIR.size - 1
+        self._history = np.zeros(history, dtype=np.int16)
+        # Index in the next packet of its first output sample (downsampling)
+        self._phase = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next packet of the stream.
+
+        Args:
+            samples: 1-D int16 array.
+
+        Returns:
+            A new int16 array with the packet's resampled audio.
+        """
+        n = samples.size
+        start = self._history.size
+        extended = np.concatenate((self._history, samples))
+
+        if self._up:
+            out = _upsample2_kernel(extended, *HALFBAND_PHASES, start, n)
+        else:
+            count = (n - self._phase + 1) // 2
+            out = _downsample2_kernel(extended, HALFBAND_FIR, start + self._phase, count)
+            self._phase += 2 * count - n
+
+        self._history = extended[extended.size - start :].copy()
+        return out
+
+
+def float_to_int16(samples) -> np.ndarray:
+    """Convert float samples in [-1.0, 1.0] to 16-bit PCM.
+
+    Values outside the range saturate instead of wrapping around.
+
+    Args:
+        samples: Sequence or array of float samples (e.g. TTS output).
+
+    Returns:
+        A new int16 array with the same number of samples.
+    """
+    samples = np.ascontiguousarray(samples, dtype=np.float32).ravel()
+    out = np.empty(samples.size, dtype=np.int16)
+    _float_to_int16_kernel(samples, out)
+    return out
@@ -13,13 +13,15 @@ Then configure PIPER_BASE_URL=http://localhost:5555/synthesize
 """
 
 import asyncio
-import io
 import os
-import wave
+import re
+import struct
 
 from aiohttp import web
 from loguru import logger
 
+from audio_utils import float_to_int16
+
 # Coqui TTS
 try:
     from TTS.api import TTS
@@ -37,11 +39,35 @@ PORT = int(os.getenv("TTS_PORT", "5555"))
 # - "tts_models/multilingual/multi-dataset/xtts_v2" - Slow, excellent quality, requires GPU
 MODEL_NAME = os.getenv("TTS_MODEL", "tts_models/fr/css10/vits")
 
+# Optional int8 dynamic quantization of the model (CPU inference)
+TTS_QUANTIZE = os.getenv("TTS_QUANTIZE", "0") == "1"
+
+# Optional torch.compile of the synthesis graph (slower startup, faster synthesis)
+TTS_COMPILE = os.getenv("TTS_COMPILE", "0") == "1"
+WARMUP_TEXT = "Bonjour, cabinet médical."
+
+# Idle keep-warm: re-run a tiny synthesis if no request arrived for this long
+KEEPALIVE_INTERVAL = float(os.getenv("TTS_KEEPALIVE_INTERVAL", "30"))
+
+# Torch intra-op threads (leave headroom for aiohttp and the other services)
+TORCH_THREADS = int(os.getenv("TTS_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Canonical 44-byte PCM WAV header (RIFF + fmt + data chunk headers)
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Size placeholder for streamed WAV files whose length is not known upfront
+WAV_STREAMING_SIZE = 0xFFFFFFFF
+
+# Responses are synthesized and streamed sentence by sentence
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:])\s+")
+
 
 class CoquiTTSServer:
     def __init__(self):
         logger.info(f"Loading Coqui TTS model: {MODEL_NAME}")
         logger.info("This may take a moment on first run (downloading model)...")
+
+        self._configure_threads()
         
         # Initialize TTS - will download model on first run
         self.tts = TTS(MODEL_NAME)
@@ -49,51 +75,159 @@ class CoquiTTSServer:
         # Get sample rate from model config
         self.sample_rate = self.tts.synthesizer.output_sample_rate
         logger.info(f"Model loaded. Sample rate: {self.sample_rate}Hz")
+
+        if TTS_QUANTIZE:
+            self._quantize_model()
+
+        if TTS_COMPILE:
+            self._compile_model()
+
+        # First synthesis populates kernel/allocator caches
+        self._warmup()
+
+        # Mono 16-bit header sent ahead of the streamed PCM data
+        self._wav_header = WAV_HEADER.pack(
+            b"RIFF", WAV_STREAMING_SIZE, b"WAVE",
+            b"fmt ", 16, 1, 1, self.sample_rate, self.sample_rate * 2, 2, 16,
+            b"data", WAV_STREAMING_SIZE,
+        )
+
+        self._keepalive_task: asyncio.Task = None
+        self._last_activity = 0.0
+        self._in_flight = 0
+        # Cleared while the keep-alive synthesis runs: the model is not
+        # thread-safe, so requests wait for it instead of running alongside
+        self._keepalive_idle: asyncio.Event = None
+
+    def _configure_threads(self):
+        """Size torch's thread pools before any inference runs."""
+        try:
+            import torch
+
+            torch.set_num_threads(TORCH_THREADS)
+            torch.set_num_interop_threads(1)
+        except Exception as e:
+            logger.warning(f"Could not configure torch threads: {e}")
+
+    def _warmup(self):
+        """Run one throwaway synthesis so the first caller gets warm kernels."""
+        self._synthesize_sync(WARMUP_TEXT)
+
+    def _quantize_model(self):
+        """Quantize the model's Linear layers to int8."""
+        try:
+            import torch
+
+            logger.info("Quantizing TTS model to int8...")
+            synthesizer = self.tts.synthesizer
+            synthesizer.tts_model = torch.ao.quantization.quantize_dynamic(
+                synthesizer.tts_model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("TTS model quantized")
+        except Exception as e:
+            logger.warning(f"Quantization failed, using fp32 model: {e}")
+
+    def _compile_model(self):
+        """Compile the model's inference graph (compiled by the warm-up run)."""
+        try:
+            import torch
+
+            model = self.tts.synthesizer.tts_model
+            logger.info("Compiling TTS model (torch.compile)...")
+            # Coqui calls model.inference(), not forward(), during synthesis
+            model.inference = torch.compile(
+                model.inference, mode="reduce-overhead", dynamic=True
+            )
+            logger.info("TTS model compiled")
+        except Exception as e:
+            logger.warning(f"torch.compile failed, using eager mode: {e}")
+
+    async def start(self):
+        """Start the keep-alive task (must run inside the event loop)."""
+        self._keepalive_idle = asyncio.Event()
+        self._keepalive_idle.set()
+        self._keepalive_task = asyncio.create_task(self._keepalive())
+        self._last_activity = asyncio.get_running_loop().time()
     
-    async def synthesize(self, request: web.Request) -> web.Response:
-        """Handle TTS synthesis requests."""
+    async def synthesize(self, request: web.Request) -> web.StreamResponse:
+        """Handle TTS synthesis requests.
+
+        The WAV header is sent immediately and audio is streamed one sentence
+        at a time, so playback can start before the whole reply is ready.
+        """
         try:
             data = await request.json()
             text = data.get("text", "")
-            
-            if not text:
-                return web.Response(status=400, text="Missing 'text' field")
-            
-            logger.debug(f"Synthesizing: {text[:50]}...")
-            
-            # Generate audio in a thread pool (TTS is CPU-bound)
-            loop = asyncio.get_event_loop()
-            audio_bytes = await loop.run_in_executor(
-                None, self._synthesize_sync, text
-            )
-            
-            return web.Response(
-                body=audio_bytes,
-                content_type="audio/wav"
-            )
-            
         except Exception as e:
             logger.error(f"Synthesis error: {e}")
             return web.Response(status=500, text=str(e))
-    
-    def _synthesize_sync(self, text: str) -> bytes:
-        """Synchronous synthesis (runs in thread pool)."""
+
+        if not text:
+            return web.Response(status=400, text="Missing 'text' field")
+
+        logger.debug(f"Synthesizing: {text[:50]}...")
+
+        sentences = [part for part in SENTENCE_SPLIT.split(text.strip()) if part]
+
+        response = web.StreamResponse(headers={"Content-Type": "audio/wav"})
+        await response.prepare(request)
+        await response.write(self._wav_header)
+
+        try:
+            for sentence in sentences:
+                await response.write(await self._synthesize(sentence))
+            await response.write_eof()
+        except ConnectionResetError:
+            # Caller hung up mid-stream (e.g. barge-in)
+            logger.debug("Client disconnected during synthesis")
+        except Exception as e:
+            # Headers are already sent: drop the connection so the client sees
+            # a truncated response rather than a short but valid one
+            logger.error(f"Synthesis error: {e}")
+            if request.transport is not None:
+                request.transport.close()
+
+        return response
+
+    async def _synthesize(self, text: str) -> memoryview:
+        """Synthesize a text in the thread pool (TTS is CPU-bound)."""
+        loop = asyncio.get_running_loop()
+        await self._keepalive_idle.wait()
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(None, self._synthesize_sync, text)
+        finally:
+            self._in_flight -= 1
+            self._last_activity = loop.time()
+
+    async def _keepalive(self):
+        """Keep model weights and kernel caches hot while the line is idle."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            idle = loop.time() - self._last_activity >= KEEPALIVE_INTERVAL
+            if idle and not self._in_flight:
+                self._keepalive_idle.clear()
+                try:
+                    await loop.run_in_executor(None, self._synthesize_sync, "Bonjour.")
+                except Exception as e:
+                    logger.debug(f"Keep-alive synthesis failed: {e}")
+                finally:
+                    self._keepalive_idle.set()
+                self._last_activity = loop.time()
+
+    def _synthesize_sync(self, text: str) -> memoryview:
+        """Synchronous synthesis to raw 16-bit PCM (runs in thread pool).
+
+        Returns a view over the freshly allocated sample buffer rather than a
+        bytes copy; the response writer accepts it as-is.
+        """
         # Synthesize to numpy array
         wav = self.tts.tts(text)
         
-        # Convert to bytes
-        import numpy as np
-        audio_int16 = (np.array(wav) * 32767).astype(np.int16)
-        
-        # Create WAV in memory
-        buffer = io.BytesIO()
-        with wave.open(buffer, "wb") as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(self.sample_rate)
-            wav_file.writeframes(audio_int16.tobytes())
-        
-        return buffer.getvalue()
+        # Convert to 16-bit PCM (single saturating pass)
+        return float_to_int16(wav).data.cast("B")
 
 
 async def health(request: web.Request) -> web.Response:
@@ -103,6 +237,7 @@ async def health(request: web.Request) -> web.Response:
 async def main():
     # Create server
     server = CoquiTTSServer()
+    await server.start()
     
     app = web.Application()
     app.router.add_post("/synthesize", server.synthesize)
@@ -14,7 +14,7 @@ Open Medical Secretary
 Components:
     - Transport: AudioSocket (Asterisk integration)
     - STT: Whisper (local, faster-whisper)
-    - LLM: Ollama (local, e.g., Llama-3 or Mistral)
+    - LLM: Ollama or llama.cpp server (local, e.g., Llama-3 or Mistral)
     - TTS: Piper (local HTTP server)
     - VAD: Silero
 
@@ -60,7 +60,7 @@ from pipecat.frames.frames import TTSSpeakFrame
 
 # Local imports
 from transports.audiosocket.transport import AudioSocketTransport, AudioSocketParams
-from services.medical_llm import MedicalLLMService
+from services.medical_llm import LlamaCppLLMService, MedicalLLMService
 from config.system_prompts import MEDICAL_SYSTEM_PROMPT, GREETING_MESSAGE
 
 # Load environment variables
@@ -78,6 +78,10 @@ logger.add(sys.stderr, level=os.getenv("LOG_LEVEL", "INFO"))
 # AudioSocket server settings
 AUDIOSOCKET_HOST = os.getenv("AUDIOSOCKET_HOST", "0.0.0.0")
 AUDIOSOCKET_PORT = int(os.getenv("AUDIOSOCKET_PORT", "9001"))
+# Let several assistant processes share the port (one call per process)
+AUDIOSOCKET_REUSE_PORT = os.getenv("AUDIOSOCKET_REUSE_PORT", "0") == "1"
+# Audio per input frame pushed to the pipeline (Asterisk sends 20ms packets)
+AUDIOSOCKET_INPUT_CHUNK_MS = int(os.getenv("AUDIOSOCKET_INPUT_CHUNK_MS", "60"))
 
 # Whisper STT settings
 # You can use: tiny, base, small, medium, large-v3, or HuggingFace model paths
@@ -86,10 +90,16 @@ WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "auto")  # cpu, cuda, auto
 WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "default")
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "FR")  # EN, FR, DE, etc.
 
+# LLM backend: "ollama" (default) or "llamacpp" (llama-server)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").lower()
+
 # Ollama LLM settings
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/v1")
 
+# llama.cpp server settings
+LLAMACPP_BASE_URL = os.getenv("LLAMACPP_BASE_URL", "http://localhost:8080/v1")
+
 # Piper TTS settings
 PIPER_BASE_URL = os.getenv("PIPER_BASE_URL", "http://localhost:5555/synthesize")
 PIPER_SAMPLE_RATE = int(os.getenv("PIPER_SAMPLE_RATE", "22050"))
@@ -117,6 +127,8 @@ async def main():
             AudioSocketParams(
                 host=AUDIOSOCKET_HOST,
                 port=AUDIOSOCKET_PORT,
+                reuse_port=AUDIOSOCKET_REUSE_PORT,
+                input_chunk_ms=AUDIOSOCKET_INPUT_CHUNK_MS,
                 audio_in_enabled=True,
                 audio_out_enabled=True,
                 vad_analyzer=SileroVADAnalyzer(
@@ -147,14 +159,19 @@ async def main():
         logger.info(f"STT: Whisper model={WHISPER_MODEL} device={WHISPER_DEVICE}")
 
         # -----------------------------------------------------------------
-        # 3. LLM - Ollama (local)
+        # 3. LLM - Ollama or llama.cpp (local)
         # -----------------------------------------------------------------
-        llm = MedicalLLMService(
-            model=OLLAMA_MODEL,
-            base_url=OLLAMA_BASE_URL,
-        )
+        if LLM_BACKEND == "llamacpp":
+            llm = LlamaCppLLMService(base_url=LLAMACPP_BASE_URL)
+
+            logger.info(f"LLM: llama.cpp base_url={LLAMACPP_BASE_URL}")
+        else:
+            llm = MedicalLLMService(
+                model=OLLAMA_MODEL,
+                base_url=OLLAMA_BASE_URL,
+            )
 
-        logger.info(f"LLM: Ollama model={OLLAMA_MODEL} base_url={OLLAMA_BASE_URL}")
+            logger.info(f"LLM: Ollama model={OLLAMA_MODEL} base_url={OLLAMA_BASE_URL}")
 
         # -----------------------------------------------------------------
         # 4. TTS - Piper (local HTTP)
@@ -95,13 +95,14 @@ class PiperServer:
         # Create WAV in memory
         buffer = io.BytesIO()
         
-        # Collect all audio chunks
-        audio_data = b''
+        # Collect all audio chunks, joined once at the end
+        parts = []
         sample_rate = 22050  # Default, will be updated from first chunk
         
         for chunk in self.voice.synthesize(text):
-            audio_data += chunk.audio_int16_bytes
+            parts.append(chunk.audio_int16_bytes)
             sample_rate = chunk.sample_rate
+        audio_data = b"".join(parts)
         
         # Write WAV file
         with wave.open(buffer, "wb") as wav_file:
@@ -10,6 +10,7 @@ All services run 100% on-premise with no cloud API calls.
 """
 
 from pipecat.services.ollama.llm import OLLamaLLMService
+from pipecat.services.openai.llm import OpenAILLMService
 
 
 class MedicalLLMService(OLLamaLLMService):
@@ -17,6 +18,11 @@ class MedicalLLMService(OLLamaLLMService):
     
     Extends OLLamaLLMService to work with locally hosted medical-focused
     language models like Llama-3-Meditron or Mistral-Small.
+
+    Requests go through Ollama's OpenAI-compatible endpoint, which ignores
+    Ollama-specific fields such as `keep_alive` and `options`. Keeping the
+    model (and its cached system prompt) loaded is therefore a server-side
+    setting: OLLAMA_KEEP_ALIVE in the environment of `ollama serve`.
     
     Usage:
         llm = MedicalLLMService(
@@ -43,3 +49,49 @@ class MedicalLLMService(OLLamaLLMService):
             **kwargs: Additional keyword arguments passed to OLLamaLLMService.
         """
         super().__init__(model=model, base_url=base_url, **kwargs)
+
+
+class LlamaCppLLMService(OpenAILLMService):
+    """Medical LLM service using a local llama.cpp server.
+
+    Talks to `llama-server` through its OpenAI-compatible endpoint. Compared
+    to Ollama it exposes flash attention, KV cache quantization and slot
+    count directly on the command line, and reuses the cached prompt prefix
+    of each slot between requests.
+
+    Usage:
+        llm = LlamaCppLLMService(base_url="http://localhost:8080/v1")
+
+    The server is expected to be started with something like:
+        llama-server -m model.gguf --jinja -fa on --ctx-size 4096 \
+            --parallel 4 --cache-type-k q8_0 --cache-type-v q8_0
+    """
+
+    def __init__(
+        self,
+        *,
+        model: str = "local",
+        base_url: str = "http://localhost:8080/v1",
+        **kwargs,
+    ):
+        """Initialize the llama.cpp LLM service.
+
+        Args:
+            model: Model name sent in requests. llama-server serves a single
+                model and ignores this value.
+            base_url: The base URL for the llama-server API endpoint.
+            **kwargs: Additional keyword arguments passed to OpenAILLMService.
+        """
+        params = kwargs.pop("params", None) or OpenAILLMService.InputParams()
+
+        extra_body = dict(params.extra.get("extra_body", {}))
+        extra_body.setdefault("cache_prompt", True)
+        params.extra = {**params.extra, "extra_body": extra_body}
+
+        super().__init__(
+            model=model,
+            base_url=base_url,
+            api_key="sk-no-key-required",
+            params=params,
+            **kwargs,
+        )
@@ -16,6 +16,9 @@ AudioSocket Protocol:
 """
 
 import asyncio
+import functools
+import math
+import socket
 import struct
 from typing import Awaitable, Callable, Optional
 
@@ -36,12 +39,7 @@ from pipecat.transports.base_input import BaseInputTransport
 from pipecat.transports.base_output import BaseOutputTransport
 from pipecat.transports.base_transport import BaseTransport, TransportParams
 
-try:
-    from scipy import signal
-except ModuleNotFoundError as e:
-    logger.error(f"Exception: {e}")
-    logger.error("Install scipy for audio resampling: pip install scipy")
-    raise Exception(f"Missing module: {e}")
+from audio_utils import HalfbandStream, downsample2_int16, upsample2_int16
 
 
 # AudioSocket packet types
@@ -50,10 +48,24 @@ AUDIOSOCKET_TYPE_UUID = 0x01
 AUDIOSOCKET_TYPE_AUDIO = 0x10
 AUDIOSOCKET_TYPE_SILENCE = 0x11
 
+# Packet header: type (1 byte) + payload length (2 bytes big-endian)
+AUDIOSOCKET_HEADER = struct.Struct(">BH")
+
 # Audio format constants
 ASTERISK_SAMPLE_RATE = 8000  # Asterisk AudioSocket uses 8kHz
 PIPECAT_SAMPLE_RATE = 16000  # Pipecat default is 16kHz
 
+# Outgoing packets are coalesced and written to the socket at most every
+# 20ms, or as soon as this many bytes are pending
+SEND_FLUSH_INTERVAL = 0.02
+SEND_BUFFER_LIMIT = 4096
+
+# Incoming bytes are read in chunks and split into packets locally
+RECEIVE_CHUNK_SIZE = 4096
+
+# Kernel socket buffer size for each Asterisk connection (both directions)
+SOCKET_BUFFER_SIZE = 65536
+
 
 class AudioSocketParams(TransportParams):
     """Configuration parameters for AudioSocket transport.
@@ -63,12 +75,22 @@ class AudioSocketParams(TransportParams):
         port: Port number to bind the TCP server to.
         asterisk_sample_rate: Sample rate from Asterisk (default 8000).
         pipeline_sample_rate: Sample rate for Pipecat pipeline (default 16000).
+        reuse_port: Bind with SO_REUSEPORT so several worker processes, each
+            running its own pipeline, can listen on the same port; the kernel
+            then spreads incoming calls across their accept queues by hash,
+            not by load. A connection reaching a worker that already has a
+            call is refused instead of replacing that call.
+        input_chunk_ms: Duration of audio pushed per input frame. Asterisk
+            sends 20ms packets; they are grouped into frames of this length
+            to cut downstream wakeups. 0 pushes each packet as it arrives.
     """
 
     host: str = "0.0.0.0"
     port: int = 9001
     asterisk_sample_rate: int = ASTERISK_SAMPLE_RATE
     pipeline_sample_rate: int = PIPECAT_SAMPLE_RATE
+    reuse_port: bool = False
+    input_chunk_ms: int = 60
 
 
 class AudioSocketCallbacks(BaseModel):
@@ -86,9 +108,39 @@ class AudioSocketCallbacks(BaseModel):
     on_client_disconnected: Callable[[str], Awaitable[None]]
 
 
+@functools.lru_cache(maxsize=None)
+def _scipy_signal():
+    """Import scipy.signal on first use.
+
+    Only ratios other than 2:1 / 1:2 need it, so the default 8kHz <-> 16kHz
+    setup never pays for importing scipy.
+    """
+    try:
+        from scipy import signal
+    except ModuleNotFoundError as e:
+        logger.error(f"Exception: {e}")
+        logger.error("Install scipy for audio resampling: pip install scipy")
+        raise Exception(f"Missing module: {e}")
+    return signal
+
+
+@functools.lru_cache(maxsize=8)
+def _resample_filter(up: int, down: int) -> np.ndarray:
+    """Design the anti-aliasing low-pass FIR for an up/down ratio, once.
+
+    Same Kaiser-windowed design `resample_poly` uses by default.
+    """
+    signal = _scipy_signal()
+    max_rate = max(up, down)
+    return signal.firwin(20 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+
+
 def resample_audio(audio: bytes, from_rate: int, to_rate: int) -> bytes:
     """Resample audio from one sample rate to another.
 
+    Uses a polyphase FIR (cost linear in the packet size) rather than an FFT,
+    whose cost depends on the factorization of each packet's length.
+
     Args:
         audio: Raw audio bytes (16-bit signed PCM).
         from_rate: Source sample rate in Hz.
@@ -103,14 +155,52 @@ def resample_audio(audio: bytes, from_rate: int, to_rate: int) -> bytes:
     # Convert bytes to numpy array
     audio_array = np.frombuffer(audio, dtype=np.int16)
 
-    # Calculate resampling ratio
-    num_samples = int(len(audio_array) * to_rate / from_rate)
+    # Reduce the ratio, e.g. 8000 -> 16000 is up=2, down=1
+    g = math.gcd(from_rate, to_rate)
+    up, down = to_rate // g, from_rate // g
+
+    # The 8kHz <-> 16kHz conversions on every packet: fixed half-band FIR
+    if (up, down) == (2, 1):
+        return upsample2_int16(audio_array).tobytes()
+    if (up, down) == (1, 2):
+        return downsample2_int16(audio_array).tobytes()
 
     # Resample using scipy
-    resampled = signal.resample(audio_array, num_samples)
+    resampled = _scipy_signal().resample_poly(
+        audio_array, up, down, window=_resample_filter(up, down)
+    )
+
+    # Convert back to int16 bytes (the filter can overshoot full scale)
+    return np.clip(resampled, -32768, 32767).astype(np.int16).tobytes()
+
+
+def make_resampler(from_rate: int, to_rate: int) -> Callable[[bytes], bytes]:
+    """Build a function resampling a stream of 16-bit PCM packets.
 
-    # Convert back to int16 bytes
-    return resampled.astype(np.int16).tobytes()
+    The rates do not change during a call, so the rate comparison and ratio
+    dispatch of `resample_audio` are resolved once here instead of per packet.
+    For 2:1 and 1:2 the returned function keeps filter state between calls,
+    so consecutive packets are filtered as one continuous signal instead of
+    clicking at every packet boundary; build a new one for each stream.
+
+    Args:
+        from_rate: Source sample rate in Hz.
+        to_rate: Target sample rate in Hz.
+
+    Returns:
+        A callable taking and returning raw audio bytes.
+    """
+    if from_rate == to_rate:
+        return lambda audio: audio
+
+    g = math.gcd(from_rate, to_rate)
+    up, down = to_rate // g, from_rate // g
+
+    if (up, down) in ((2, 1), (1, 2)):
+        stream = HalfbandStream(up=up == 2)
+        return lambda audio: stream.process(np.frombuffer(audio, dtype=np.int16)).tobytes()
+
+    return functools.partial(resample_audio, from_rate=from_rate, to_rate=to_rate)
 
 
 class AudioSocketInputTransport(BaseInputTransport):
@@ -140,6 +230,15 @@ class AudioSocketInputTransport(BaseInputTransport):
         self._transport = transport
         self._params = params
         self._callbacks = callbacks
+        self._resample = make_resampler(
+            params.asterisk_sample_rate, params.pipeline_sample_rate
+        )
+
+        # Resampled input audio waiting to fill a frame of input_chunk_ms
+        self._audio_buffer = bytearray()
+        self._audio_chunk_size = (
+            params.pipeline_sample_rate * params.input_chunk_ms // 1000 * 2
+        )
 
         self._reader: Optional[asyncio.StreamReader] = None
         self._writer: Optional[asyncio.StreamWriter] = None
@@ -216,7 +315,10 @@ class AudioSocketInputTransport(BaseInputTransport):
         logger.info(f"Starting AudioSocket server on {self._params.host}:{self._params.port}")
 
         self._server = await asyncio.start_server(
-            self._client_handler, self._params.host, self._params.port
+            self._client_handler,
+            self._params.host,
+            self._params.port,
+            reuse_port=self._params.reuse_port or None,
         )
 
         async with self._server:
@@ -231,17 +333,45 @@ class AudioSocketInputTransport(BaseInputTransport):
         addr = writer.get_extra_info("peername")
         logger.info(f"New Asterisk connection from {addr}")
 
-        # Only allow one connection at a time
+        self._configure_socket(writer)
+
+        # Only allow one connection at a time. With reuse_port the kernel
+        # picks the worker by hash, not by load, so a busy worker may be
+        # chosen: refuse the newcomer rather than hang up the live call.
+        if self._reader is not None and self._params.reuse_port:
+            logger.warning("Call already in progress on this worker, refusing new connection")
+            writer.close()
+            return
+
         if self._reader is not None:
             logger.warning("Only one Asterisk connection allowed, closing previous")
             await self._close_client_connection()
 
         self._reader = reader
         self._writer = writer
+        # Fresh filter state: the previous call's audio must not bleed in
+        self._resample = make_resampler(
+            self._params.asterisk_sample_rate, self._params.pipeline_sample_rate
+        )
 
         # Start receiving audio packets
         self._receive_task = self.create_task(self._receive_packets())
 
+    def _configure_socket(self, writer: asyncio.StreamWriter):
+        """Tune the connection for small, frequent real-time audio packets."""
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+            except OSError as e:
+                logger.debug(f"Could not set socket options: {e}")
+
+        # drain() waits for the kernel buffer instead of letting audio pile up
+        # in user space, so interruptions do not replay stale audio
+        writer.transport.set_write_buffer_limits(high=0)
+
     async def _close_client_connection(self):
         """Close the current client connection."""
         if self._writer:
@@ -253,6 +383,7 @@ class AudioSocketInputTransport(BaseInputTransport):
             self._writer = None
 
         self._reader = None
+        self._audio_buffer.clear()
 
         if self._call_uuid:
             await self._callbacks.on_client_disconnected(self._call_uuid)
@@ -260,37 +391,35 @@ class AudioSocketInputTransport(BaseInputTransport):
 
     async def _receive_packets(self):
         """Receive and process AudioSocket packets from Asterisk."""
+        # Bytes received but not yet parsed (at most one partial packet)
+        buffer = bytearray()
         try:
-            while self._reader and not self._reader.at_eof():
-                # Read 3-byte header
-                header = await self._reader.readexactly(3)
-                packet_type = header[0]
-                payload_length = struct.unpack(">H", header[1:3])[0]
-
-                # Read payload
-                payload = b""
-                if payload_length > 0:
-                    payload = await self._reader.readexactly(payload_length)
-
-                # Process packet based on type
-                if packet_type == AUDIOSOCKET_TYPE_TERMINATE:
-                    logger.info("Received TERMINATE packet, call ended")
+            while self._reader:
+                data = await self._reader.read(RECEIVE_CHUNK_SIZE)
+                if not data:
+                    logger.info("Asterisk connection closed")
                     break
+                buffer += data
+
+                # Process every complete packet currently buffered
+                offset = 0
+                terminated = False
+                with memoryview(buffer) as view:
+                    while len(buffer) - offset >= 3:
+                        packet_type, payload_length = AUDIOSOCKET_HEADER.unpack_from(buffer, offset)
+                        end = offset + 3 + payload_length
+                        if end > len(buffer):
+                            break
+                        payload = bytes(view[offset + 3 : end])
+                        offset = end
+
+                        if not await self._handle_packet(packet_type, payload):
+                            terminated = True
+                            break
+                if terminated:
+                    break
+                del buffer[:offset]
 
-                elif packet_type == AUDIOSOCKET_TYPE_UUID:
-                    self._call_uuid = payload.decode("utf-8").strip()
-                    logger.info(f"Call UUID: {self._call_uuid}")
-                    await self._callbacks.on_client_connected(self._call_uuid)
-
-                elif packet_type == AUDIOSOCKET_TYPE_AUDIO:
-                    await self._handle_audio_packet(payload)
-
-                elif packet_type == AUDIOSOCKET_TYPE_SILENCE:
-                    # Generate silence frames if needed (optional)
-                    pass
-
-        except asyncio.IncompleteReadError:
-            logger.info("Asterisk connection closed (incomplete read)")
         except asyncio.CancelledError:
             logger.info("Receive task cancelled")
             raise
@@ -299,6 +428,34 @@ class AudioSocketInputTransport(BaseInputTransport):
         finally:
             await self._close_client_connection()
 
+    async def _handle_packet(self, packet_type: int, payload: bytes) -> bool:
+        """Process one AudioSocket packet.
+
+        Args:
+            packet_type: The packet type byte.
+            payload: The packet payload.
+
+        Returns:
+            False once the call has been terminated, True otherwise.
+        """
+        if packet_type == AUDIOSOCKET_TYPE_TERMINATE:
+            logger.info("Received TERMINATE packet, call ended")
+            return False
+
+        elif packet_type == AUDIOSOCKET_TYPE_UUID:
+            self._call_uuid = payload.decode("utf-8").strip()
+            logger.info(f"Call UUID: {self._call_uuid}")
+            await self._callbacks.on_client_connected(self._call_uuid)
+
+        elif packet_type == AUDIOSOCKET_TYPE_AUDIO:
+            await self._handle_audio_packet(payload)
+
+        elif packet_type == AUDIOSOCKET_TYPE_SILENCE:
+            # Generate silence frames if needed (optional)
+            pass
+
+        return True
+
     async def _handle_audio_packet(self, audio_data: bytes):
         """Process an audio packet from Asterisk.
 
@@ -306,15 +463,25 @@ class AudioSocketInputTransport(BaseInputTransport):
             audio_data: Raw audio bytes (16-bit PCM, 8kHz mono).
         """
         # Resample from Asterisk rate (8kHz) to pipeline rate (16kHz)
-        resampled_audio = resample_audio(
-            audio_data,
-            self._params.asterisk_sample_rate,
-            self._params.pipeline_sample_rate,
-        )
+        audio_data = self._resample(audio_data)
+
+        # Group packets into input_chunk_ms frames
+        buffer = self._audio_buffer
+        buffer += audio_data
+        chunk_size = self._audio_chunk_size
+        while buffer and len(buffer) >= chunk_size:
+            chunk = bytes(buffer[:chunk_size]) if chunk_size else bytes(buffer)
+            del buffer[: len(chunk)]
+            await self._push_audio(chunk)
 
-        # Create and push input frame
+    async def _push_audio(self, audio: bytes):
+        """Push pipeline-rate audio to the pipeline as an input frame.
+
+        Args:
+            audio: Raw audio bytes (16-bit PCM, pipeline rate mono).
+        """
         frame = InputAudioRawFrame(
-            audio=resampled_audio,
+            audio=audio,
             sample_rate=self._params.pipeline_sample_rate,
             num_channels=1,
         )
@@ -345,16 +512,27 @@ class AudioSocketOutputTransport(BaseOutputTransport):
 
         self._transport = transport
         self._params = params
+        self._resample = make_resampler(
+            params.pipeline_sample_rate, params.asterisk_sample_rate
+        )
 
         self._writer: Optional[asyncio.StreamWriter] = None
         self._initialized = False
 
+        self._send_buffer = bytearray()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
     def set_writer(self, writer: Optional[asyncio.StreamWriter]):
         """Set the TCP writer for sending audio to Asterisk.
 
         Args:
             writer: The StreamWriter to use, or None to clear.
         """
+        # Pending audio and resampler state belong to the previous call
+        self._discard_send_buffer()
+        self._resample = make_resampler(
+            self._params.pipeline_sample_rate, self._params.asterisk_sample_rate
+        )
         self._writer = writer
 
     async def start(self, frame: StartFrame):
@@ -378,7 +556,7 @@ class AudioSocketOutputTransport(BaseOutputTransport):
             frame: The end frame signaling transport shutdown.
         """
         await super().stop(frame)
-        # Send terminate packet
+        # Send terminate packet (after any audio still buffered)
         await self._send_terminate()
 
     async def cancel(self, frame: CancelFrame):
@@ -388,6 +566,7 @@ class AudioSocketOutputTransport(BaseOutputTransport):
             frame: The cancel frame signaling immediate cancellation.
         """
         await super().cancel(frame)
+        self._discard_send_buffer()
 
     async def cleanup(self):
         """Cleanup resources and parent transport."""
@@ -408,18 +587,17 @@ class AudioSocketOutputTransport(BaseOutputTransport):
 
         try:
             # Resample from pipeline rate (16kHz) to Asterisk rate (8kHz)
-            resampled_audio = resample_audio(
-                frame.audio,
-                self._params.pipeline_sample_rate,
-                self._params.asterisk_sample_rate,
-            )
-
-            # Build AudioSocket packet
-            packet = self._build_audio_packet(resampled_audio)
-
-            # Send to Asterisk
-            self._writer.write(packet)
-            await self._writer.drain()
+            audio = self._resample(frame.audio)
+
+            # Queue the AudioSocket packet: one socket write per 20ms, not per frame
+            self._append_audio_packet(audio)
+            if len(self._send_buffer) >= SEND_BUFFER_LIMIT:
+                self._flush_send_buffer()
+                await self._writer.drain()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(
+                    SEND_FLUSH_INTERVAL, self._flush_send_buffer
+                )
 
             return True
 
@@ -427,18 +605,38 @@ class AudioSocketOutputTransport(BaseOutputTransport):
             logger.error(f"Error writing audio to Asterisk: {e}")
             return False
 
-    def _build_audio_packet(self, audio_data: bytes) -> bytes:
-        """Build an AudioSocket audio packet.
+    def _flush_send_buffer(self):
+        """Write all queued packets to the socket in a single call."""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if self._writer and self._send_buffer:
+            # Hand the buffer itself to the transport (no copy) and start a
+            # new one; the transport may keep a view of it until it is sent
+            data, self._send_buffer = self._send_buffer, bytearray()
+            self._writer.write(data)
+        else:
+            self._send_buffer.clear()
+
+    def _discard_send_buffer(self):
+        """Drop queued packets without sending them."""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._send_buffer.clear()
+
+    def _append_audio_packet(self, audio_data: bytes):
+        """Append an AudioSocket audio packet to the send buffer.
+
+        Header and payload are appended separately, without concatenating
+        them into an intermediate packet object first.
 
         Args:
             audio_data: Raw audio bytes to send.
-
-        Returns:
-            Complete AudioSocket packet with header.
         """
-        # Header: type (1 byte) + length (2 bytes big-endian)
-        header = struct.pack(">BH", AUDIOSOCKET_TYPE_AUDIO, len(audio_data))
-        return header + audio_data
+        self._send_buffer += AUDIOSOCKET_HEADER.pack(AUDIOSOCKET_TYPE_AUDIO, len(audio_data))
+        self._send_buffer += audio_data
 
     async def _send_terminate(self):
         """Send a terminate packet to Asterisk."""
@@ -446,9 +644,10 @@ class AudioSocketOutputTransport(BaseOutputTransport):
             return
 
         try:
-            # Terminate packet has no payload
-            packet = struct.pack(">BH", AUDIOSOCKET_TYPE_TERMINATE, 0)
-            self._writer.write(packet)
+            # Terminate packet has no payload; queue it behind any pending
+            # audio so both go out in the same socket write
+            self._send_buffer += AUDIOSOCKET_HEADER.pack(AUDIOSOCKET_TYPE_TERMINATE, 0)
+            self._flush_send_buffer()
             await self._writer.drain()
         except Exception as e:
             logger.debug(f"Error sending terminate packet: {e}")
@@ -0,0 +1,78 @@
+"""
+Open Medical Secretary - Process helpers
+Spawning, readiness polling and shutdown of the local services, shared by the
+launcher (start.py) and the end-to-end test scripts.
+"""
+
+import os
+import random
+import signal
+import subprocess
+import time
+
+# Run each child in its own process group so cleanup can signal the
+# workers it spawns (ollama runners, TTS/assistant subprocesses) too
+if os.name == "posix":
+    CHILD_GROUP_KWARGS = {"start_new_session": True}
+else:
+    CHILD_GROUP_KWARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+# Seconds between SIGTERM and SIGKILL when stopping services
+STOP_TIMEOUT = 3
+
+
+def wait_until(check, timeout=30, base=0.025, cap=1.0, proc=None):
+    """Poll `check()` with jittered exponential backoff until it succeeds.
+
+    Delays start at `base` and double up to `cap`; the jitter keeps
+    services started together from probing in lockstep. If `proc` is
+    given, give up as soon as that process exits.
+    """
+    deadline = time.monotonic() + timeout
+    delay = base
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        if proc is not None and proc.poll() is not None:
+            return False
+        time.sleep(delay + random.uniform(0, delay * 0.25))
+        delay = min(delay * 2, cap)
+    return False
+
+
+def signal_group(proc, sig):
+    """Send `sig` to the process group led by `proc`."""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, sig)
+        elif sig == signal.SIGTERM:
+            proc.terminate()
+        else:
+            proc.kill()
+    except OSError:
+        pass  # Group already gone
+
+
+def stop_processes(processes, timeout=STOP_TIMEOUT):
+    """Stop processes: SIGTERM their groups, then SIGKILL stragglers.
+
+    Empties `processes` once every child has been reaped.
+    """
+    for proc in processes:
+        signal_group(proc, signal.SIGTERM)
+
+    # poll() reaps each child as soon as it exits
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(proc.poll() is not None for proc in processes):
+            break
+        time.sleep(0.05)
+
+    # Also catches grandchildren left behind by an exited leader
+    for proc in processes:
+        signal_group(proc, getattr(signal, "SIGKILL", signal.SIGTERM))
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            pass
+    processes.clear()
@@ -8,68 +8,134 @@ import os
 import sys
 import time
 import signal
+import socket
 import asyncio
 import subprocess
+import http.client
+import urllib.request
 import webbrowser
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+from process_utils import CHILD_GROUP_KWARGS, stop_processes, wait_until
+
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
+# Same settings the assistant reads (main.py also lets .env win)
+load_dotenv(Path(__file__).parent / ".env", override=True)
+
 # Configuration
 WEB_PORT = 3000
 OLLAMA_PORT = 11434
+LLAMACPP_PORT = 8080
 TTS_PORT = 5555
 ASSISTANT_PORT = 9001
 
+# Ollama server tuning (only applied when we launch `ollama serve` ourselves).
+# Keeping the model resident and the KV cache compact lets every call reuse
+# the prefilled medical system prompt instead of recomputing it.
+OLLAMA_SERVER_ENV = {
+    "OLLAMA_FLASH_ATTENTION": "1",
+    "OLLAMA_KV_CACHE_TYPE": "q8_0",
+    "OLLAMA_KEEP_ALIVE": "-1",
+    "OLLAMA_NUM_PARALLEL": "4",
+}
+
+# LLM backend: "ollama" (default) or "llamacpp" (llama-server)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").lower()
+LLAMACPP_MODEL = os.getenv("LLAMACPP_MODEL", "")
+
+# Console log formatting, one preformatted template per level
+LOG_COLORS = {
+    "INFO": "\033[94m",
+    "OK": "\033[92m",
+    "WARN": "\033[93m",
+    "ERROR": "\033[91m",
+}
+LOG_RESET = "\033[0m"
+LOG_TEMPLATES = {
+    level: f"{color}{{t}} [{level}] {{m}}{LOG_RESET}"
+    for level, color in LOG_COLORS.items()
+}
+
 class OpenMedicalSecretary:
     def __init__(self):
         self.processes = []
         self.base_dir = Path(__file__).parent
         self.running = True
+        # start_* run in worker threads: serialize their console output.
+        # Reentrant because the signal handler logs from the main thread,
+        # possibly while it is interrupted inside log().
+        self._log_lock = threading.RLock()
         
     def log(self, message, level="INFO"):
-        colors = {
-            "INFO": "\033[94m",
-            "OK": "\033[92m",
-            "WARN": "\033[93m",
-            "ERROR": "\033[91m",
-            "RESET": "\033[0m"
-        }
-        timestamp = time.strftime("%H:%M:%S")
-        print(f"{colors.get(level, '')}{timestamp} [{level}] {message}{colors['RESET']}")
+        template = LOG_TEMPLATES.get(level) or f"{{t}} [{level}] {{m}}{LOG_RESET}"
+        line = template.format(t=time.strftime("%H:%M:%S"), m=message)
+        with self._log_lock:
+            print(line, flush=True)
 
     def check_port(self, port):
-        import socket
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            return s.connect_ex(('localhost', port)) == 0
+            s.settimeout(0.05)
+            return s.connect_ex(('127.0.0.1', port)) == 0
 
-    def wait_for_port(self, port, timeout=30):
-        start = time.time()
-        while time.time() - start < timeout:
-            if self.check_port(port):
-                return True
-            time.sleep(0.5)
-        return False
+    def wait_ready(self, check, timeout=30, proc=None):
+        return wait_until(check, timeout, proc=proc)
+
+    def wait_for_port(self, port, timeout=30, proc=None):
+        return self.wait_ready(lambda: self.check_port(port), timeout, proc=proc)
+
+    def check_tts_health(self):
+        """Check that our TTS server (not just any process) owns its port."""
+        try:
+            with urllib.request.urlopen(
+                f"http://127.0.0.1:{TTS_PORT}/health", timeout=1
+            ) as resp:
+                return resp.read().strip() == b"OK"
+        except (OSError, http.client.HTTPException):
+            # Not reachable, or something that doesn't speak HTTP
+            return False
+
+    def check_exited(self, name, proc):
+        """Log and return True if `proc` has already exited (startup crash)."""
+        rc = proc.poll()
+        if rc is None:
+            return False
+        self.log(f"Échec {name} (exit {rc})", "ERROR")
+        return True
 
     def start_ollama(self):
         """Start Ollama if not running."""
+        if LLM_BACKEND == "llamacpp":
+            return self.start_llamacpp()
+
         if self.check_port(OLLAMA_PORT):
             self.log("Ollama déjà actif", "OK")
             return True
         
         self.log("Démarrage d'Ollama...")
+        env = os.environ.copy()
+        for key, value in OLLAMA_SERVER_ENV.items():
+            env.setdefault(key, value)
+
         try:
             proc = subprocess.Popen(
                 ["ollama", "serve"],
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                stderr=subprocess.DEVNULL,
+                env=env,
+                **CHILD_GROUP_KWARGS
             )
             self.processes.append(proc)
-            if self.wait_for_port(OLLAMA_PORT, 15):
+            if self.wait_for_port(OLLAMA_PORT, 15, proc):
                 self.log("Ollama démarré", "OK")
                 return True
+            elif self.check_exited("Ollama", proc):
+                return False
             else:
                 self.log("Ollama timeout", "WARN")
                 return False
@@ -77,11 +143,56 @@ class OpenMedicalSecretary:
             self.log("Ollama non installé! Exécutez ./install.sh", "ERROR")
             return False
 
+    def start_llamacpp(self):
+        """Start llama.cpp server if not running."""
+        if self.check_port(LLAMACPP_PORT):
+            self.log("llama-server déjà actif", "OK")
+            return True
+
+        if not LLAMACPP_MODEL:
+            self.log("LLAMACPP_MODEL non défini (chemin du modèle .gguf)", "ERROR")
+            return False
+
+        self.log("Démarrage de llama-server...")
+        try:
+            proc = subprocess.Popen(
+                [
+                    "llama-server",
+                    "-m", LLAMACPP_MODEL,
+                    "--host", "127.0.0.1",
+                    "--port", str(LLAMACPP_PORT),
+                    "--jinja",
+                    "-fa", "on",
+                    "--ctx-size", "4096",
+                    "--parallel", "4",
+                    "--cache-type-k", "q8_0",
+                    "--cache-type-v", "q8_0",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **CHILD_GROUP_KWARGS
+            )
+            self.processes.append(proc)
+            if self.wait_for_port(LLAMACPP_PORT, 60, proc):
+                self.log("llama-server démarré", "OK")
+                return True
+            elif self.check_exited("llama-server", proc):
+                return False
+            else:
+                self.log("llama-server timeout", "WARN")
+                return False
+        except FileNotFoundError:
+            self.log("llama-server non installé (llama.cpp)", "ERROR")
+            return False
+
     def start_tts(self):
         """Start Coqui TTS server."""
         if self.check_port(TTS_PORT):
-            self.log("TTS déjà actif", "OK")
-            return True
+            if self.check_tts_health():
+                self.log("TTS déjà actif", "OK")
+                return True
+            self.log(f"Port {TTS_PORT} occupé par un autre programme", "ERROR")
+            return False
         
         self.log("Démarrage TTS (Coqui)...")
         env = os.environ.copy()
@@ -91,13 +202,16 @@ class OpenMedicalSecretary:
             [sys.executable, str(self.base_dir / "backend" / "coqui_server.py")],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            env=env
+            env=env,
+            **CHILD_GROUP_KWARGS
         )
         self.processes.append(proc)
         
-        if self.wait_for_port(TTS_PORT, 60):
+        if self.wait_ready(self.check_tts_health, 60, proc=proc):
             self.log("TTS démarré", "OK")
             return True
+        elif self.check_exited("TTS", proc):
+            return False
         else:
             self.log("TTS timeout (premier démarrage peut être long)", "WARN")
             return True  # Continue anyway
@@ -116,20 +230,43 @@ class OpenMedicalSecretary:
             [sys.executable, str(self.base_dir / "backend" / "main.py")],
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
-            env=env
+            env=env,
+            **CHILD_GROUP_KWARGS
         )
         self.processes.append(proc)
         
-        if self.wait_for_port(ASSISTANT_PORT, 30):
+        if self.wait_for_port(ASSISTANT_PORT, 30, proc):
             self.log("Assistant démarré", "OK")
             return True
+        elif self.check_exited("Assistant", proc):
+            return False
         else:
             self.log("Assistant timeout", "WARN")
             return True
 
+    async def start_services(self):
+        """Start Ollama, TTS and the assistant concurrently.
+
+        Each service warms up independently, so startup takes as long as the
+        slowest one instead of the sum of all three.
+        """
+        loop = asyncio.get_running_loop()
+        starters = [self.start_ollama, self.start_tts, self.start_assistant]
+        
+        # One thread per service, kept apart from asyncio's default pool
+        with ThreadPoolExecutor(max_workers=len(starters),
+                                thread_name_prefix="startup") as pool:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, starter) for starter in starters),
+                return_exceptions=True
+            )
+        for result in results:
+            if isinstance(result, Exception):
+                self.log(f"Erreur de démarrage: {result}", "ERROR")
+
     def start_web(self):
         """Start the web server."""
-        from web import create_app
+        from web import create_app, serve
         app = create_app()
         
         self.log(f"Interface web sur http://localhost:{WEB_PORT}", "OK")
@@ -141,18 +278,13 @@ class OpenMedicalSecretary:
         
         threading.Thread(target=open_browser, daemon=True).start()
         
-        # Run Flask in main thread
-        app.run(host='0.0.0.0', port=WEB_PORT, debug=False, use_reloader=False)
+        # Serve the dashboard in the main thread
+        serve(app, host='0.0.0.0', port=WEB_PORT)
 
     def cleanup(self):
-        """Stop all processes."""
+        """Stop all processes: SIGTERM their groups, then SIGKILL stragglers."""
         self.log("Arrêt des services...")
-        for proc in self.processes:
-            try:
-                proc.terminate()
-                proc.wait(timeout=5)
-            except:
-                proc.kill()
+        stop_processes(self.processes)
         self.log("Services arrêtés", "OK")
 
     def run(self):
@@ -171,9 +303,7 @@ class OpenMedicalSecretary:
         signal.signal(signal.SIGTERM, signal_handler)
         
         # Start services
-        self.start_ollama()
-        self.start_tts()
-        self.start_assistant()
+        asyncio.run(self.start_services())
         
         # Start web interface (blocking)
         try:
@@ -0,0 +1,41 @@
+"""
+WAV playback helpers shared by the test scripts.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+AUDIO_PLAYERS = ("afplay", "paplay", "aplay")  # macOS, PulseAudio, ALSA
+
+
+def find_player():
+    """Return the first available command-line audio player, or None."""
+    for player in AUDIO_PLAYERS:
+        if shutil.which(player):
+            return player
+    return None
+
+
+def listen_command(path: str) -> str:
+    """Command line a user can run to play `path` on this machine."""
+    if sys.platform == "win32":
+        return f'start "" "{path}"'
+    return f"{find_player() or AUDIO_PLAYERS[-1]} {path}"
+
+
+def play_audio(path: str):
+    """Start playing a WAV file in the background (does not wait for it)."""
+    if sys.platform == "win32":
+        os.startfile(path)
+        return
+    player = find_player()
+    if player:
+        subprocess.Popen(
+            [player, path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        return
+    print(f"   Aucun lecteur audio trouvé ({', '.join(AUDIO_PLAYERS)})")
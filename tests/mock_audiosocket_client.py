@@ -15,35 +15,76 @@ Usage:
     python tests/mock_audiosocket_client.py
     python tests/mock_audiosocket_client.py --audio-file test.wav
     python tests/mock_audiosocket_client.py --host 127.0.0.1 --port 9001
+    python tests/mock_audiosocket_client.py --no-realtime  # send as fast as possible
 """
 
 import argparse
 import asyncio
+import mmap
+import os
 import struct
 import sys
 import uuid
 import wave
 from pathlib import Path
 
+import numpy as np
+
 # AudioSocket packet types
 TYPE_TERMINATE = 0x00
 TYPE_UUID = 0x01
 TYPE_AUDIO = 0x10
 
+# AudioSocket header: type (1 byte) + payload length (2 bytes big-endian)
+HEADER = struct.Struct(">BH")
+
+# Audio pacing: 320 bytes = 20ms at 8kHz mono 16-bit
+CHUNK_SIZE = 320
+CHUNK_DURATION = 0.02
+SEND_INTERVAL = 0.1  # wake up every 100ms and send the packets that are due
+FAST_BATCH = 50  # packets per write when not pacing (1s of audio)
+
 
 def build_packet(packet_type: int, payload: bytes) -> bytes:
     """Build an AudioSocket packet."""
-    header = struct.pack(">BH", packet_type, len(payload))
-    return header + payload
+    return HEADER.pack(packet_type, len(payload)) + payload
 
 
 def parse_packet(data: bytes) -> tuple:
     """Parse an AudioSocket packet header."""
     if len(data) < 3:
         return None, 0
-    packet_type = data[0]
-    payload_length = struct.unpack(">H", data[1:3])[0]
-    return packet_type, payload_length
+    return HEADER.unpack_from(data, 0)
+
+
+async def send_audio(writer: asyncio.StreamWriter, audio_data, realtime: bool = True):
+    """Send audio in real time, batching the packets due at each wake-up.
+    
+    audio_data can be any buffer (bytes, mmap...); payloads are written
+    as memoryview slices of it, without copying each chunk. Without
+    realtime, packets go out as fast as the server reads them.
+    """
+    audio = memoryview(audio_data)
+    offsets = range(0, len(audio), CHUNK_SIZE)
+    
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    sent = 0
+    while sent < len(offsets):
+        if realtime:
+            # Packet n is due n * 20ms after the start
+            due = min(len(offsets), int((loop.time() - start) / CHUNK_DURATION) + 1)
+        else:
+            due = min(len(offsets), sent + FAST_BATCH)
+        if due > sent:
+            for offset in offsets[sent:due]:
+                chunk = audio[offset : offset + CHUNK_SIZE]
+                writer.write(HEADER.pack(TYPE_AUDIO, len(chunk)))
+                writer.write(chunk)
+            await writer.drain()
+            sent = due
+        if sent < len(offsets):
+            await asyncio.sleep(SEND_INTERVAL if realtime else 0)
 
 
 async def receive_audio(reader: asyncio.StreamReader, output_file: str):
@@ -52,29 +93,36 @@ async def receive_audio(reader: asyncio.StreamReader, output_file: str):
     
     print("📥 Receiving audio from server...")
     
+    buf = bytearray()
+    
     try:
-        while not reader.at_eof():
-            # Read header
-            header = await asyncio.wait_for(reader.readexactly(3), timeout=30.0)
-            packet_type, payload_length = parse_packet(header)
-            
-            # Read payload
-            if payload_length > 0:
-                payload = await reader.readexactly(payload_length)
-            else:
-                payload = b""
-            
-            if packet_type == TYPE_TERMINATE:
-                print("📴 Received TERMINATE packet")
+        terminated = False
+        while not terminated:
+            data = await asyncio.wait_for(reader.read(65536), timeout=30.0)
+            if not data:
+                print("📴 Connection closed by server")
                 break
-            elif packet_type == TYPE_AUDIO:
-                audio_data.append(payload)
-                print(f"📥 Received {len(payload)} bytes of audio")
+            buf += data
+            
+            # Parse every complete packet currently buffered
+            while len(buf) >= 3:
+                packet_type, payload_length = parse_packet(buf)
+                end = 3 + payload_length
+                if len(buf) < end:
+                    break
+                payload = bytes(buf[3:end])
+                del buf[:end]
+                
+                if packet_type == TYPE_TERMINATE:
+                    print("📴 Received TERMINATE packet")
+                    terminated = True
+                    break
+                elif packet_type == TYPE_AUDIO:
+                    audio_data.append(payload)
+                    print(f"📥 Received {len(payload)} bytes of audio")
             
     except asyncio.TimeoutError:
         print("⏱️ Timeout waiting for response")
-    except asyncio.IncompleteReadError:
-        print("📴 Connection closed by server")
     except Exception as e:
         print(f"❌ Error receiving: {e}")
     
@@ -89,7 +137,8 @@ async def receive_audio(reader: asyncio.StreamReader, output_file: str):
         print(f"💾 Saved {len(all_audio)} bytes to {output_file}")
 
 
-async def main(host: str, port: int, audio_file: str = None, output_file: str = "response.wav"):
+async def main(host: str, port: int, audio_file: str = None, output_file: str = "response.wav",
+               realtime: bool = True):
     """Run mock AudioSocket client."""
     
     print(f"🔌 Connecting to {host}:{port}...")
@@ -109,21 +158,18 @@ async def main(host: str, port: int, audio_file: str = None, output_file: str =
         if audio_file and Path(audio_file).exists():
             print(f"📤 Sending audio from {audio_file}...")
             
-            with wave.open(audio_file, "rb") as wf:
-                # Read all audio
-                audio_data = wf.readframes(wf.getnframes())
-                
-                # Send in chunks (320 bytes = 20ms at 8kHz mono 16-bit)
-                chunk_size = 320
-                for i in range(0, len(audio_data), chunk_size):
-                    chunk = audio_data[i : i + chunk_size]
-                    packet = build_packet(TYPE_AUDIO, chunk)
-                    writer.write(packet)
-                    await writer.drain()
-                    # Simulate real-time: 20ms per chunk
-                    await asyncio.sleep(0.02)
-                
-                print(f"📤 Sent {len(audio_data)} bytes of audio")
+            with open(audio_file, "rb") as f, wave.open(f, "rb") as wf:
+                # wave stops right after the "data" chunk header
+                data_offset = f.tell()
+                data_length = wf.getnframes() * wf.getsampwidth() * wf.getnchannels()
+                wav_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            
+            # Map the PCM samples instead of reading them into memory; the
+            # mapping stays open until the transport has flushed the slices
+            audio_data = memoryview(wav_map)[data_offset : data_offset + data_length]
+            await send_audio(writer, audio_data, realtime)
+            
+            print(f"📤 Sent {len(audio_data)} bytes of audio")
         else:
             # Generate synthetic audio (silence with some noise)
             print("📤 Sending 3 seconds of test silence...")
@@ -131,20 +177,12 @@ async def main(host: str, port: int, audio_file: str = None, output_file: str =
             duration_sec = 3
             num_samples = sample_rate * duration_sec
             
-            # Generate mostly silence
-            import random
-            audio_data = bytes([
-                (random.randint(-100, 100) + 128) % 256 
-                for _ in range(num_samples * 2)
-            ])
+            # Generate mostly silence (low-level 16-bit noise)
+            audio_data = np.random.randint(
+                -100, 101, size=num_samples, dtype=np.int16
+            ).tobytes()
             
-            chunk_size = 320
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i : i + chunk_size]
-                packet = build_packet(TYPE_AUDIO, chunk)
-                writer.write(packet)
-                await writer.drain()
-                await asyncio.sleep(0.02)
+            await send_audio(writer, audio_data, realtime)
             
             print(f"📤 Sent {len(audio_data)} bytes of test audio")
         
@@ -176,7 +214,14 @@ if __name__ == "__main__":
     parser.add_argument("--port", type=int, default=9001, help="Server port")
     parser.add_argument("--audio-file", help="WAV file to send (8kHz mono)")
     parser.add_argument("--output-file", default="response.wav", help="Output WAV file")
+    parser.add_argument(
+        "--realtime",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("OMS_TEST_FAST") != "1",
+        help="Pace audio at 20ms per packet (needed against Asterisk; "
+             "off by default when OMS_TEST_FAST=1)"
+    )
     
     args = parser.parse_args()
     
-    asyncio.run(main(args.host, args.port, args.audio_file, args.output_file))
+    asyncio.run(main(args.host, args.port, args.audio_file, args.output_file, args.realtime))
@@ -11,83 +11,81 @@ Usage:
 
 import argparse
 import atexit
+import hashlib
 import os
 import signal
+import socket
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+import urllib.request
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from audio_playback import listen_command, play_audio  # sibling module in tests/
+from process_utils import CHILD_GROUP_KWARGS, stop_processes, wait_until
+
+# Test utterance, synthesized once per TTS model and cached in the temp dir
+TEST_SENTENCE = "Bonjour, je voudrais prendre un rendez-vous pour demain matin."
+TTS_MODEL = os.getenv("TTS_MODEL", "tts_models/fr/css10/vits")
 
 # Track background processes for cleanup
 _processes = []
 
 
 def cleanup():
-    """Kill all background processes."""
-    for p in _processes:
-        try:
-            p.terminate()
-            p.wait(timeout=2)
-        except:
-            try:
-                p.kill()
-            except:
-                pass
+    """Kill all background processes (SIGTERM, then SIGKILL after 3s)."""
+    stop_processes(_processes)
+
+
+def _handle_signal(sig, frame):
+    """Stop the services and wait for them before exiting."""
+    # A second CTRL+C must not interrupt the cleanup half-way
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    cleanup()
+    sys.exit(0)
 
 
 atexit.register(cleanup)
-signal.signal(signal.SIGINT, lambda s, f: sys.exit(0))
-signal.signal(signal.SIGTERM, lambda s, f: sys.exit(0))
+signal.signal(signal.SIGINT, _handle_signal)
+signal.signal(signal.SIGTERM, _handle_signal)
 
 
 def check_port(port: int) -> bool:
     """Check if a port is open."""
-    import socket
-    try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1)
-        sock.connect(("127.0.0.1", port))
-        sock.close()
-        return True
-    except:
-        return False
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.05)
+        return sock.connect_ex(("127.0.0.1", port)) == 0
 
 
 def wait_for_port(port: int, timeout: int = 30):
     """Wait for a port to become available."""
-    start = time.time()
-    while time.time() - start < timeout:
-        if check_port(port):
-            return True
-        time.sleep(0.5)
-    return False
+    return wait_until(lambda: check_port(port), timeout)
 
 
 def start_ollama():
     """Start Ollama if not running."""
-    import urllib.request
-    try:
-        urllib.request.urlopen("http://localhost:11434/api/tags", timeout=2)
+    if check_port(11434):
         print("   ✅ Ollama déjà actif")
         return True
-    except:
-        pass
     
     print("   ⏳ Démarrage Ollama...")
     p = subprocess.Popen(
         ["ollama", "serve"],
         stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL
+        stderr=subprocess.DEVNULL,
+        **CHILD_GROUP_KWARGS
     )
     _processes.append(p)
-    time.sleep(3)
     
-    try:
-        urllib.request.urlopen("http://localhost:11434/api/tags", timeout=5)
+    if wait_for_port(11434, timeout=15):
         print("   ✅ Ollama démarré")
         return True
-    except:
+    else:
         print("   ❌ Échec Ollama")
         return False
 
@@ -104,7 +102,8 @@ def start_tts():
         [sys.executable, "coqui_server.py"],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
-        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cwd=REPO_ROOT,
+        **CHILD_GROUP_KWARGS
     )
     _processes.append(p)
     
@@ -128,7 +127,8 @@ def start_main():
         [sys.executable, "main.py"],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
-        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cwd=REPO_ROOT,
+        **CHILD_GROUP_KWARGS
     )
     _processes.append(p)
     
@@ -141,26 +141,47 @@ def start_main():
 
 
 def create_test_audio():
-    """Create test audio with TTS."""
-    from TTS.api import TTS
+    """Create test audio with the running TTS server (cached on disk)."""
+    import json
     import numpy as np
     import wave
     from scipy import signal
     
+    # Same model + sentence + rate always gives the same file: reuse it
+    # (v2: files cached before clipping was added may contain wrapped peaks)
+    cache_key = hashlib.blake2b(
+        f"{TTS_MODEL}|{TEST_SENTENCE}|8000|v2".encode(), digest_size=16
+    ).hexdigest()
+    audio_path = os.path.join(tempfile.gettempdir(), f"oms_tts_{cache_key}.wav")
+    if os.path.exists(audio_path):
+        print(f"\n✅ Audio de test en cache: {audio_path}")
+        return audio_path
+    
     print("\n⏳ Création audio de test...")
-    tts = TTS('tts_models/fr/css10/vits')
-    wav = tts.tts("Bonjour, je voudrais prendre un rendez-vous pour demain matin.")
+    # The TTS server already has the model loaded: no need to load it here
+    req = urllib.request.Request(
+        "http://localhost:5555/synthesize",
+        data=json.dumps({"text": TEST_SENTENCE}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        body = resp.read()
     
-    audio_int16 = (np.array(wav) * 32767).astype(np.int16)
-    resampled = signal.resample(audio_int16, int(len(audio_int16) * 8000 / 22050))
-    resampled_int16 = resampled.astype(np.int16)
+    # 44-byte WAV header (sample rate at offset 24), then 16-bit PCM
+    sample_rate = int.from_bytes(body[24:28], "little")
+    audio_int16 = np.frombuffer(body, dtype=np.int16, offset=44)
+    resampled = signal.resample_poly(audio_int16, up=8000, down=sample_rate)
+    # The filter can overshoot full scale on loud peaks: saturate, don't wrap
+    resampled_int16 = np.clip(resampled, -32768, 32767).astype(np.int16)
     
-    audio_path = "/tmp/test_speech.wav"
-    with wave.open(audio_path, 'wb') as f:
+    # Write next to the cache entry, then rename: never leave a partial file
+    tmp_path = f"{audio_path}.{os.getpid()}.tmp"
+    with wave.open(tmp_path, 'wb') as f:
         f.setnchannels(1)
         f.setsampwidth(2)
         f.setframerate(8000)
         f.writeframes(resampled_int16.tobytes())
+    os.replace(tmp_path, audio_path)
     
     print(f"✅ Audio créé: {audio_path}")
     return audio_path
@@ -192,33 +213,42 @@ def test_full(play: bool = False):
     
     # Run test client
     print("\n📞 Exécution du test...")
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    result = subprocess.run(
+    # Parse the client output line by line as it runs
+    proc = subprocess.Popen(
         [sys.executable, "tests/mock_audiosocket_client.py", "--audio-file", audio_path],
-        capture_output=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
-        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        timeout=90
+        bufsize=1,
+        cwd=REPO_ROOT,
+        # No real-time pacing; unbuffered so lines arrive as they are printed
+        env={**os.environ, "OMS_TEST_FAST": "1", "PYTHONUNBUFFERED": "1"},
     )
+    timer = threading.Timer(90, proc.kill)
+    timer.start()
     
-    total_time = time.time() - start_time
-    output = result.stdout + result.stderr
-    
-    # Parse results
-    connected = "Connected!" in output
-    received = "Received" in output and "bytes of audio" in output
-    saved = "Saved" in output
-    
-    # Get response size
+    connected = received = False
     response_size = 0
-    if saved:
-        for line in output.split("\n"):
-            if "Saved" in line and "bytes" in line:
+    try:
+        for line in proc.stdout:
+            if "Connected!" in line:
+                connected = True
+            elif "Received" in line and "bytes of audio" in line:
+                received = True
+            elif "Saved" in line and "bytes" in line:
+                # "💾 Saved <n> bytes to <file>"
+                words = line.split()
                 try:
-                    response_size = int(line.split()[1])
-                except:
+                    response_size = int(words[words.index("Saved") + 1])
+                except (ValueError, IndexError):
                     pass
+        proc.wait()
+    finally:
+        timer.cancel()
+    
+    total_time = time.perf_counter() - start_time
     
     print(f"\n{'='*60}")
     print(f"📊 Résultats:")
@@ -229,17 +259,14 @@ def test_full(play: bool = False):
     print(f"   Temps total: {total_time:.1f}s")
     print(f"{'='*60}")
     
-    response_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
-        "response.wav"
-    )
+    response_path = os.path.join(REPO_ROOT, "response.wav")
     
     if os.path.exists(response_path):
         if play:
             print(f"\n🎧 Lecture de la réponse...")
-            subprocess.run(["afplay", response_path])
+            play_audio(response_path)
         else:
-            print(f"\n🎧 Pour écouter: afplay {response_path}")
+            print(f"\n🎧 Pour écouter: {listen_command(response_path)}")
     
     success = connected and received and response_size > 0
     print(f"\n{'✅ TEST RÉUSSI!' if success else '❌ TEST ÉCHOUÉ'}")
@@ -10,6 +10,8 @@ Usage:
 """
 
 import argparse
+import http.client
+import json
 import os
 import subprocess
 import sys
@@ -17,30 +19,88 @@ import time
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from process_utils import wait_until
+
+# Keep-alive connection reused by every health check
+_ollama_conn = None
+
 
 def check_ollama():
-    """Check if Ollama is running, start it if not."""
-    import urllib.request
+    """Check if Ollama is running."""
+    global _ollama_conn
+    if _ollama_conn is None:
+        # Connect timeout: loopback either accepts or refuses immediately
+        _ollama_conn = http.client.HTTPConnection("localhost", 11434, timeout=0.1)
     try:
-        urllib.request.urlopen("http://localhost:11434/api/tags", timeout=2)
-        return True
-    except:
+        if _ollama_conn.sock is None:
+            _ollama_conn.connect()
+            # Read timeout: a loaded server may take a moment to answer
+            _ollama_conn.sock.settimeout(0.5)
+        _ollama_conn.request("HEAD", "/api/tags")
+        resp = _ollama_conn.getresponse()
+        resp.read()
+        return resp.status == 200
+    except (OSError, http.client.HTTPException):
+        # Reconnects automatically on the next request
+        _ollama_conn.close()
         return False
 
 
-def start_ollama():
-    """Start Ollama service."""
+def start_ollama(timeout: float = 15):
+    """Start Ollama service and wait until it answers."""
     print("⏳ Démarrage d'Ollama...")
     subprocess.Popen(
         ["ollama", "serve"],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL
     )
-    time.sleep(3)
-    return check_ollama()
+    
+    return wait_until(check_ollama, timeout)
+
+
+def pull_model(conn: http.client.HTTPConnection, model: str) -> bool:
+    """Pull a model through the Ollama API, printing progress as it streams."""
+    conn.request(
+        "POST",
+        "/api/pull",
+        body=json.dumps({"model": model, "stream": True}).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    resp = conn.getresponse()
+    if resp.status != 200:
+        error = resp.read().decode(errors="replace").strip()
+        print(f"❌ Erreur HTTP {resp.status}: {error}")
+        return False
+    status = None
+    ok = True
+    # One JSON object per line: {"status": ..., "completed": ..., "total": ...}
+    for line in resp:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            # Not Ollama's NDJSON (e.g. a proxy error page): report and skip
+            print(f"\n⚠️  Réponse inattendue: {line.decode(errors='replace').strip()}")
+            ok = False
+            continue
+        if "error" in data:
+            print(f"\n❌ {data['error']}")
+            ok = False
+            continue
+        if data.get("status") != status:
+            if status is not None:
+                print()
+            status = data.get("status")
+            print(f"   {status}", end="", flush=True)
+        if data.get("total"):
+            percent = 100 * data.get("completed", 0) // data["total"]
+            print(f"\r   {status}: {percent}%", end="", flush=True)
+    print()
+    return ok and status == "success"
 
 
-def test_ollama(model: str = "llama3:8b", prompt: str = None):
+def test_ollama(model: str = "llama3:8b", prompt: str = None, quiet: bool = False):
     """Test Ollama LLM - auto-starts if needed."""
     
     print(f"\n{'='*60}")
@@ -58,20 +118,24 @@ def test_ollama(model: str = "llama3:8b", prompt: str = None):
     
     print("✅ Ollama est prêt")
     
-    # Check model
-    import urllib.request
-    import json
+    # One keep-alive connection for the model check and the chat request,
+    # so TCP setup is not part of the measured time
+    conn = http.client.HTTPConnection("localhost", 11434, timeout=60)
     
+    # Check model
     try:
-        with urllib.request.urlopen("http://localhost:11434/api/tags") as resp:
-            data = json.loads(resp.read())
-            models = [m["name"] for m in data.get("models", [])]
-    except:
+        conn.request("GET", "/api/tags")
+        data = json.loads(conn.getresponse().read())
+        models = [m["name"] for m in data.get("models", [])]
+    except (OSError, http.client.HTTPException, ValueError):
+        conn.close()
         models = []
     
     if model not in models:
         print(f"\n⏳ Téléchargement du modèle {model}...")
-        subprocess.run(["ollama", "pull", model], capture_output=True)
+        if not pull_model(conn, model):
+            print(f"❌ Impossible de télécharger {model}")
+            return None
     
     # Test prompt
     if not prompt:
@@ -82,49 +146,109 @@ def test_ollama(model: str = "llama3:8b", prompt: str = None):
     print(f"\n👤 User: {prompt}")
     print(f"🤖 Assistant: ", end="", flush=True)
     
-    # Make request
-    start = time.time()
-    
-    import urllib.request
     payload = json.dumps({
         "model": model,
         "messages": [
             {"role": "system", "content": MEDICAL_SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        "stream": False
+        "stream": True
     }).encode()
     
-    req = urllib.request.Request(
-        "http://localhost:11434/v1/chat/completions",
-        data=payload,
+    # Make request, printing tokens as they arrive (SSE "data: {...}" lines)
+    start = time.perf_counter()
+    first_token_time = None
+    last_token = None
+    token_gaps = []  # inter-token latencies
+    parts = []
+    
+    conn.request(
+        "POST",
+        "/v1/chat/completions",
+        body=payload,
         headers={"Content-Type": "application/json"}
     )
+    resp = conn.getresponse()
+    if resp.status != 200:
+        # e.g. 404 for an unknown model: the body is an error, not a stream
+        error = resp.read().decode(errors="replace").strip()
+        conn.close()
+        print(f"\n❌ Erreur HTTP {resp.status}: {error}")
+        return None
+    for line in resp:
+        if not line.startswith(b"data: "):
+            continue
+        data = line[6:].strip()
+        if data == b"[DONE]":
+            break
+        choices = json.loads(data)["choices"]
+        content = choices[0]["delta"].get("content") if choices else None
+        if content:
+            now = time.perf_counter()
+            if first_token_time is None:
+                first_token_time = now - start
+            else:
+                token_gaps.append(now - last_token)
+            last_token = now
+            parts.append(content)
+            # Timestamps are taken above, so terminal I/O never skews them
+            if not quiet:
+                sys.stdout.write(content)
+                if len(parts) % 16 == 0:
+                    sys.stdout.flush()
+    sys.stdout.flush()
+    resp.read()
+    conn.close()
+    
+    response_time = time.perf_counter() - start
+    response = "".join(parts)
+    
+    # Decode phase: time per output token after the first (TPOT) and the
+    # spread of inter-token latencies (P50/P99)
+    tokens = len(parts)
+    tpot = p50 = p99 = None
+    if token_gaps:
+        tpot = (last_token - start - first_token_time) / len(token_gaps)
+        token_gaps.sort()
+        p50 = token_gaps[len(token_gaps) // 2]
+        p99 = token_gaps[min(len(token_gaps) - 1, int(len(token_gaps) * 0.99))]
     
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        data = json.loads(resp.read())
-        response = data["choices"][0]["message"]["content"]
-    
-    response_time = time.time() - start
-    
-    print(response)
+    print()
     
     print(f"\n{'='*60}")
     print(f"📊 Résultats '{model}':")
+    if first_token_time is not None:
+        print(f"   Premier token (TTFT): {first_token_time:.2f}s")
+    if tpot is not None:
+        print(f"   Par token (TPOT): {tpot * 1000:.1f}ms")
+        print(f"   Inter-token P50/P99: {p50 * 1000:.1f}ms / {p99 * 1000:.1f}ms")
     print(f"   Temps de réponse: {response_time:.2f}s")
+    print(f"   Requête: {len(payload)} octets")
+    print(f"   Tokens: {tokens}")
     print(f"   Longueur: {len(response)} caractères")
     print(f"{'='*60}")
     
-    return {"model": model, "response_time": response_time}
+    return {
+        "model": model,
+        "first_token_time": first_token_time,
+        "tpot": tpot,
+        "itl_p50": p50,
+        "itl_p99": p99,
+        "input_bytes": len(payload),
+        "tokens": tokens,
+        "response_time": response_time,
+    }
 
 
 def main():
     parser = argparse.ArgumentParser(description="Test Ollama LLM")
     parser.add_argument("--model", default="llama3:8b")
     parser.add_argument("--prompt", default=None)
+    parser.add_argument("--quiet", action="store_true",
+                       help="N'affiche pas la réponse pendant la génération")
     args = parser.parse_args()
     
-    test_ollama(model=args.model, prompt=args.prompt)
+    test_ollama(model=args.model, prompt=args.prompt, quiet=args.quiet)
 
 
 if __name__ == "__main__":
@@ -8,19 +8,31 @@ Usage:
     python tests/test_tts.py
     python tests/test_tts.py --text "Bonjour"
     python tests/test_tts.py --play  # Joue l'audio automatiquement
+    python tests/test_tts.py --iterations 5  # Moyenne sur 5 synthèses
 """
 
 import argparse
+import functools
 import os
-import subprocess
+import statistics
 import sys
 import time
-import wave
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# backend/ modules import each other by bare name (as start.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
 
+from audio_playback import listen_command, play_audio  # sibling module in tests/
 
-def test_tts(text: str = None, play: bool = False):
+
+@functools.lru_cache(maxsize=1)
+def _load_tts(model: str):
+    """Load a Coqui TTS model once per process."""
+    from TTS.api import TTS
+    return TTS(model)
+
+
+def test_tts(text: str = None, play: bool = False, iterations: int = 1):
     """Test Coqui TTS - standalone, no server needed."""
     
     print(f"\n{'='*60}")
@@ -33,38 +45,49 @@ def test_tts(text: str = None, play: bool = False):
     print(f"Texte: {text}")
     print()
     
+    # Helpers for saving the result: imported before the timer (audio_utils
+    # JIT-compiles its kernels at import) so it only covers TTS + model load
+    import soundfile as sf
+    from audio_utils import float_to_int16
+    
     # Import and load
     print("⏳ Chargement du modèle...")
-    start = time.time()
-    
-    from TTS.api import TTS
-    import numpy as np
+    start = time.perf_counter()
     
     model = "tts_models/fr/css10/vits"
-    tts = TTS(model)
-    
-    load_time = time.time() - start
-    print(f"✅ Modèle chargé en {load_time:.2f}s")
+    tts = _load_tts(model)
     
-    # Synthesize
-    print("\n⏳ Synthèse vocale...")
-    start = time.time()
+    load_time = time.perf_counter() - start
     
-    wav = tts.tts(text)
+    import torch  # already imported by TTS
+    print(f"✅ Modèle chargé en {load_time:.2f}s")
     
-    synth_time = time.time() - start
+    # No autograd bookkeeping: synth_time measures inference only
+    with torch.inference_mode():
+        # First call pays for lazy initialization: keep it out of the timing
+        print("\n⏳ Préchauffage...")
+        start = time.perf_counter()
+        tts.tts("Bonjour.")
+        warmup_time = time.perf_counter() - start
+        print(f"✅ Préchauffé en {warmup_time:.2f}s")
+        
+        # Synthesize (the model stays loaded across iterations)
+        print("\n⏳ Synthèse vocale...")
+        synth_times = []
+        for _ in range(max(1, iterations)):
+            start = time.perf_counter()
+            wav = tts.tts(text)
+            synth_times.append(time.perf_counter() - start)
+    
+    synth_time = statistics.mean(synth_times)
     
     # Convert and save
-    audio_int16 = (np.array(wav) * 32767).astype(np.int16)
+    audio_int16 = float_to_int16(wav)
     sample_rate = tts.synthesizer.output_sample_rate
     duration = len(audio_int16) / sample_rate
     
     output_path = "/tmp/test_tts.wav"
-    with wave.open(output_path, 'wb') as f:
-        f.setnchannels(1)
-        f.setsampwidth(2)
-        f.setframerate(sample_rate)
-        f.writeframes(audio_int16.tobytes())
+    sf.write(output_path, audio_int16, sample_rate, subtype="PCM_16")
     
     rtf = synth_time / duration  # Real-time factor
     
@@ -74,27 +97,40 @@ def test_tts(text: str = None, play: bool = False):
     print(f"\n{'='*60}")
     print(f"📊 Résultats:")
     print(f"   Chargement: {load_time:.2f}s")
-    print(f"   Synthèse: {synth_time:.2f}s")
+    print(f"   Préchauffage: {warmup_time:.2f}s")
+    if len(synth_times) > 1:
+        print(f"   Synthèse: {synth_time:.2f}s ± {statistics.stdev(synth_times):.2f}s "
+              f"(min {min(synth_times):.2f}s, {len(synth_times)} essais)")
+    else:
+        print(f"   Synthèse: {synth_time:.2f}s")
     print(f"   Durée audio: {duration:.2f}s")
     print(f"   RTF: {rtf:.2f}x {'(temps réel)' if rtf < 1 else '(plus lent)'}")
     print(f"{'='*60}")
     
     if play:
         print(f"\n🎧 Lecture...")
-        subprocess.run(["afplay", output_path])
+        play_audio(output_path)
     else:
-        print(f"\n🎧 Pour écouter: afplay {output_path}")
-    
-    return {"load_time": load_time, "synth_time": synth_time, "rtf": rtf}
+        print(f"\n🎧 Pour écouter: {listen_command(output_path)}")
+    
+    return {
+        "load_time": load_time,
+        "warmup_time": warmup_time,
+        "synth_time": synth_time,
+        "synth_times": synth_times,
+        "rtf": rtf,
+    }
 
 
 def main():
     parser = argparse.ArgumentParser(description="Test Coqui TTS")
     parser.add_argument("--text", default=None)
     parser.add_argument("--play", action="store_true", help="Joue l'audio automatiquement")
+    parser.add_argument("--iterations", type=int, default=1,
+                       help="Nombre de synthèses à chronométrer")
     args = parser.parse_args()
     
-    test_tts(text=args.text, play=args.play)
+    test_tts(text=args.text, play=args.play, iterations=args.iterations)
 
 
 if __name__ == "__main__":
@@ -4,25 +4,134 @@ Flask-based dashboard for doctors
 """
 
 import os
-import json
 import socket
+import time
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import waitress
+except ImportError:
+    waitress = None
 
 # Configuration
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data"
 STATIC_DIR = BASE_DIR / "web" / "static"
 TEMPLATES_DIR = BASE_DIR / "web" / "templates"
+ENV_FILE = BASE_DIR / ".env"
+
+# Upper bound for a single status probe, so a dropped SYN can't stall /api/status
+PORT_CHECK_TIMEOUT = 0.2
+
+# Ports probed by /api/status
+SERVICE_PORTS = {
+    'ollama': 11434,
+    'tts': 5555,
+    'assistant': 9001,
+    'asterisk': 5060
+}
+
+# LLM server port per LLM_BACKEND (reported under the 'ollama' key)
+LLM_PORTS = {
+    'ollama': 11434,
+    'llamacpp': 8080
+}
+
+# Runs the status probes concurrently instead of one after another
+_probe_pool = ThreadPoolExecutor(max_workers=len(SERVICE_PORTS))
+
+# Parsed .env, refreshed only when the file's mtime changes
+_env_cache = {"mtime": None, "data": {}}
 
 
+def load_env():
+    """Load configuration from .env (cached until the file changes)."""
+    try:
+        mtime = ENV_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    
+    if mtime != _env_cache["mtime"]:
+        config = {}
+        for line in ENV_FILE.read_text().split('\n'):
+            if '=' in line and not line.startswith('#'):
+                key, value = line.split('=', 1)
+                config[key.strip()] = value.strip().strip('"')
+        _env_cache["data"] = config
+        _env_cache["mtime"] = mtime
+    
+    return dict(_env_cache["data"])
+
+
+def ttl_cache(seconds):
+    """Memoize a function's result per positional arguments for `seconds`.
+
+    Concurrent callers missing the cache for the same arguments wait for a
+    single in-flight call instead of each making their own.
+    """
+    def decorator(func):
+        cache = {}
+        locks = {}
+        
+        def lookup(args):
+            hit = cache.get(args)
+            if hit is not None and time.monotonic() - hit[1] < seconds:
+                return hit
+            return None
+        
+        @functools.wraps(func)
+        def wrapper(*args):
+            hit = lookup(args)
+            if hit is not None:
+                return hit[0]
+            with locks.setdefault(args, threading.Lock()):
+                # Another request may have refreshed it while we waited
+                hit = lookup(args)
+                if hit is not None:
+                    return hit[0]
+                result = func(*args)
+                cache[args] = (result, time.monotonic())
+                return result
+        
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
+
+@ttl_cache(seconds=1.0)
 def check_port(port):
     """Check if a port is open."""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(PORT_CHECK_TIMEOUT)
         return s.connect_ex(('localhost', port)) == 0
 
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson, used when it is installed."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default),
+                                        mimetype=self.mimetype)
+
+
 def create_app():
     """Create Flask application."""
     app = Flask(__name__,
@@ -31,6 +140,9 @@ def create_app():
     
     app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key')
     
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    
     # Ensure data directory exists
     DATA_DIR.mkdir(exist_ok=True)
     
@@ -65,12 +177,9 @@ def create_app():
     @app.route('/api/status')
     def api_status():
         """Get services status."""
-        services = {
-            'ollama': check_port(11434),
-            'tts': check_port(5555),
-            'assistant': check_port(9001),
-            'asterisk': check_port(5060)
-        }
+        backend = load_env().get('LLM_BACKEND') or os.environ.get('LLM_BACKEND', 'ollama')
+        ports = dict(SERVICE_PORTS, ollama=LLM_PORTS.get(backend.lower(), LLM_PORTS['ollama']))
+        services = dict(zip(ports, _probe_pool.map(check_port, ports.values())))
         
         return jsonify({
             'services': services,
@@ -81,16 +190,8 @@ def create_app():
     @app.route('/api/config', methods=['GET', 'POST'])
     def api_config():
         """Get or update configuration."""
-        env_file = BASE_DIR / ".env"
-        
         if request.method == 'GET':
-            config = {}
-            if env_file.exists():
-                for line in env_file.read_text().split('\n'):
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.split('=', 1)
-                        config[key.strip()] = value.strip().strip('"')
-            return jsonify(config)
+            return jsonify(load_env())
         
         else:  # POST
             data = request.json
@@ -109,7 +210,8 @@ DOCTOR_PHONE_NUMBER="{data.get('doctor_phone', '')}"
 # AI Model
 OLLAMA_MODEL="{data.get('ollama_model', 'llama3.2:3b')}"
 """
-            env_file.write_text(content)
+            ENV_FILE.write_text(content)
+            _env_cache["mtime"] = None
             return jsonify({'success': True})
     
     @app.route('/api/calls')
@@ -117,7 +219,9 @@ OLLAMA_MODEL="{data.get('ollama_model', 'llama3.2:3b')}"
         """Get call history."""
         calls_file = DATA_DIR / "calls.json"
         if calls_file.exists():
-            return jsonify(json.loads(calls_file.read_text()))
+            # Already JSON on disk: serve it as-is instead of decoding and re-encoding
+            return send_from_directory(DATA_DIR, calls_file.name,
+                                       mimetype='application/json')
         return jsonify([])
     
     @app.route('/api/test')
@@ -131,6 +235,19 @@ OLLAMA_MODEL="{data.get('ollama_model', 'llama3.2:3b')}"
     return app
 
 
+def serve(app, host='127.0.0.1', port=3000):
+    """Serve the dashboard, with waitress when it is installed.
+
+    The Werkzeug debug server is only used with FLASK_ENV=development, and
+    then only on localhost since its debugger can run arbitrary code.
+    """
+    if os.environ.get('FLASK_ENV') == 'development':
+        app.run(host='127.0.0.1', port=port, debug=True, use_reloader=False)
+    elif waitress is not None:
+        waitress.serve(app, host=host, port=port, threads=8)
+    else:
+        app.run(host=host, port=port, debug=False, threaded=True, use_reloader=False)
+
+
 if __name__ == '__main__':
-    app = create_app()
-    app.run(debug=True, port=3000)
+    serve(create_app())